@@ -2,13 +2,17 @@ import os
 import re
 import match
 
+# Actor checkpoints are saved as "<step>k_actor.pth"
+ACTOR_FILE_PATTERN = re.compile(r"(\d+)k_actor\.pth")
+
 
 def extract_step_numbers(env_name,exp_number):
     step_numbers = []
-    for file_name in os.listdir(f"./models/{env_name}/{exp_number}"):
-        match = re.search("(\d+)._actor.pth", file_name)
-        if match:
-            step_numbers.append(int(match.group(1)))
+    with os.scandir(f"./models/{env_name}/{exp_number}") as entries:
+        for entry in entries:
+            found = ACTOR_FILE_PATTERN.fullmatch(entry.name)
+            if found:
+                step_numbers.append(int(found.group(1)))
     return sorted(step_numbers)
 
 if __name__ == '__main__':
@@ -19,14 +23,13 @@ if __name__ == '__main__':
     exp_numbers = extract_step_numbers(env_name,number)
 
     os.makedirs(f"./evaluate/{env_name}", exist_ok=True)
-    if os.path.exists(f"./evaluate/{env_name}/output_{number}.txt"):
-        os.remove(f"./evaluate/output_{number}.txt")
-    for exp in exp_numbers:
-        goal_num, opp_num, done_stats, avg_episode_step = match.match(env_name,number, exp,max_episode,display)
-        with open(f'./evaluate/output_{number}.txt', 'a+', encoding='utf-8', errors='ignore') as f:
-            text = f"\nexp_x_k_step {exp}\ntest_match_number {max_episode}\ngoal {goal_num}\nopp_goal {opp_num}\navg_episode_step {avg_episode_step}\n"
-            f.write(text)
+    with open(f"./evaluate/{env_name}/output_{number}.txt", 'w', encoding='utf-8', errors='ignore') as f:
+        for exp in exp_numbers:
+            goal_num, opp_num, done_stats, avg_episode_step = match.match(env_name,number, exp,max_episode,display)
+            lines = [f"\nexp_x_k_step {exp}\ntest_match_number {max_episode}\ngoal {goal_num}\nopp_goal {opp_num}\navg_episode_step {avg_episode_step}\n"]
             for d in done_stats:
-                text = f"{d} {done_stats[d]}\n"
-                f.write(text)
-            f.write("================================")
\ No newline at end of file
+                lines.append(f"{d} {done_stats[d]}\n")
+            lines.append("================================")
+            f.write("".join(lines))
+            # Each match takes a while, keep finished results on disk
+            f.flush()
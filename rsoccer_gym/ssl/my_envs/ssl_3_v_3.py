@@ -57,6 +57,8 @@ class SSL3v3Env(SSLBaseEnv):
         # scale max dist rw to 1 Considering that max possible move rw if ball and robot are in opposite corners of field
         self.ball_dist_scale = np.linalg.norm([self.field.width, self.field.length / 2])
         self.ball_grad_scale = np.linalg.norm([self.field.width / 2, self.field.length / 2]) / 4
+        # Goal pos for __ball_grad_rw, fixed for the whole run
+        self._goal = np.array([self.field.length / 2, 0.])
 
         # scale max energy rw to 1 Considering that max possible energy if max robot wheel speed sent every step
         wheel_max_rad_s = 160
@@ -343,7 +345,7 @@ class SSL3v3Env(SSLBaseEnv):
         assert (self.last_frame is not None)
 
         # Goal pos
-        goal = np.array([self.field.length / 2, 0.])
+        goal = self._goal
 
         # Calculate previous ball dist
         last_ball = self.last_frame.ball
@@ -1,12 +1,62 @@
 import math
-import random
 from typing import Dict
 
 import gym
 import numpy as np
 from rsoccer_gym.Entities import Frame, Robot, Ball
 from rsoccer_gym.ssl.ssl_gym_base import SSLBaseEnv
-from rsoccer_gym.Utils import KDTree
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, without it the kernels below run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+_INV_PI = 1 / math.pi
+_DEG2RAD = math.pi / 180.0
+
+
+@njit(cache=True, fastmath=True)
+def _convert_actions(a_x, a_y, a_theta, angle, max_v, max_w):
+    """Denormalize, clip to absolute max and convert to local"""
+    # Denormalize
+    v_x = a_x * max_v
+    v_y = a_y * max_v
+    v_theta = a_theta * max_w
+    # Convert to local
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+    v_x, v_y = v_x * cos_a + v_y * sin_a, -v_x * sin_a + v_y * cos_a
+
+    # clip by max absolute
+    v_norm = math.sqrt(v_x * v_x + v_y * v_y)
+    if v_norm >= max_v:
+        c = max_v / v_norm
+        v_x, v_y = v_x * c, v_y * c
+    return v_x, v_y, v_theta
+
+
+@njit(cache=True, fastmath=True)
+def _ball_grad(last_x, last_y, x, y, goal_x, goal_y):
+    """Clipped decrease of the distance to the goal center between two frames"""
+    last_dist = math.hypot(goal_x - last_x, goal_y - last_y)
+    dist = math.hypot(goal_x - x, goal_y - y)
+    return max(-1.0, min(1.0, (last_dist - dist) * 10.0))
+
+
+@njit(cache=True, fastmath=True)
+def _robot_grad(last_x, last_y, x, y, goal_x, half_goal_wid):
+    """Clipped decrease of the distance to the nearest goalpost (up, down or mid) between two frames"""
+    last_dx = goal_x - last_x
+    last_dist = min(math.hypot(last_dx, half_goal_wid - last_y),
+                    math.hypot(last_dx, -half_goal_wid - last_y),
+                    math.hypot(last_dx, -last_y))
+    dx = goal_x - x
+    dist = min(math.hypot(dx, half_goal_wid - y),
+               math.hypot(dx, -half_goal_wid - y),
+               math.hypot(dx, -y))
+    return max(-1.0, min(1.0, (last_dist - dist) * 10.0))
 
 
 class SSLShootEnv(SSLBaseEnv):
@@ -45,6 +95,9 @@ class SSLShootEnv(SSLBaseEnv):
         self.max_dribbler_time = 100
         self.action_space = gym.spaces.Box(low=-1, high=1,
                                            shape=(4,), dtype=np.float32)
+        # Random robot actions are drawn from these bounds directly, not with action_space.sample()
+        self._action_low = self.action_space.low.astype(np.float64)
+        self._action_high = self.action_space.high.astype(np.float64)
 
         n_obs = 4 + 7 * self.n_robots_blue + 5 * self.n_robots_yellow
         self.observation_space = gym.spaces.Box(low=-self.NORM_BOUNDS,
@@ -67,6 +120,29 @@ class SSLShootEnv(SSLBaseEnv):
         self.max_w = 10
         self.kick_speed_x = 5.0
 
+        # Observation buffer, filled in place every step (see _frame_to_observations)
+        self._obs_buf = np.empty(n_obs, dtype=np.float32)
+        self._yellow_obs_start = 4 + 7 * self.n_robots_blue
+        self._blue_theta = np.empty(self.n_robots_blue)
+        # Robots state, columns [X, Y, theta, v_x, v_y, v_theta]
+        self._blue_state = np.empty((self.n_robots_blue, 6))
+        self._yellow_state = np.empty((self.n_robots_yellow, 6))
+        self._pos_scale = 1 / self.max_pos
+        self._v_scale = 1 / self.max_v
+        self._w_scale = 1 / self.max_w
+        # Compile the action kernel now rather than on the first step
+        self.convert_actions(np.zeros(3), 0.)
+
+        # Field parameters
+        self._half_len = self.field.length / 2
+        self._half_wid = self.field.width / 2
+        self._pen_len = self.field.penalty_length
+        self._half_pen_wid = self.field.penalty_width / 2
+        self._half_goal_wid = self.field.goal_width / 2
+        self._mid_goal = (self._half_len, 0.)
+        # Compile the reward kernels now rather than on the first step
+        _ball_grad(0., 0., 0., 0., *self._mid_goal)
+        _robot_grad(0., 0., 0., 0., self._half_len, self._half_goal_wid)
 
         self.active_robot_idx = 0
         self.last_possession_robot_id = -1
@@ -75,19 +151,31 @@ class SSLShootEnv(SSLBaseEnv):
         self.done_limit = None
         self.dribbler_time = 0
         self.commands = None
-        self.reward_shaping_total = {
-            'goal': 0,
-            'done_left_out': 0,
-            'done_ball_out': 0,
-            'done_robot_out': 0,
-            'done_robot_in_gk_area': 0,
-            'rw_ball_grad': 0,
-            'rw_robot_grad': 0,
-            'rw_robot_orientation': 0,
-            'rw_energy': 0
-        }
+        # Current/last frame references, refreshed by _cache_frame
+        self._robot0 = self._ball = self._last_robot0 = self._last_ball = None
+        # Filled in place by _get_commands, blue robots first then yellow
+        self._cmd_buf = [None] * (self.n_robots_blue + self.n_robots_yellow)
+        self._rng = np.random.default_rng()
+        self._rw_keys = (
+            'goal',
+            'done_left_out',
+            'done_ball_out',
+            'done_robot_out',
+            'done_robot_in_gk_area',
+            'rw_ball_grad',
+            'rw_robot_grad',
+            'rw_robot_orientation',
+            'rw_energy'
+        )
+        self._rw_zero = dict.fromkeys(self._rw_keys, 0)
+        # Reset in place every step, step() returns this same dict as info
+        self.reward_shaping_total = dict(self._rw_zero)
         print('Environment initialized', "Obs:", n_obs)
 
+    def seed(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+        return [seed]
+
     def reset(self):
         self.dribbler_time = 0
         return super().reset()
@@ -97,40 +185,56 @@ class SSLShootEnv(SSLBaseEnv):
 
         return observation, reward, done, self.reward_shaping_total
 
-    def _frame_to_observations(self):
-
-        observation = []
+    def _cache_frame(self):
+        """Caches the current frame state read by the observation and reward terms"""
+        self._robot0 = self.frame.robots_blue[0]
+        self._ball = self.frame.ball
+        self._last_robot0 = self.last_frame.robots_blue[0] if self.last_frame is not None else None
+        self._last_ball = self.last_frame.ball if self.last_frame is not None else None
 
-        observation.append(self.norm_pos(self.frame.ball.x))
-        observation.append(self.norm_pos(self.frame.ball.y))
-        observation.append(self.norm_v(self.frame.ball.v_x))
-        observation.append(self.norm_v(self.frame.ball.v_y))
+        self._blue_state[:] = [[r.x, r.y, r.theta, r.v_x, r.v_y, r.v_theta]
+                               for r in map(self.frame.robots_blue.__getitem__,
+                                            range(self.n_robots_blue))]
+        self._yellow_state[:] = [[r.x, r.y, r.theta, r.v_x, r.v_y, r.v_theta]
+                                 for r in map(self.frame.robots_yellow.__getitem__,
+                                              range(self.n_robots_yellow))]
 
-        for i in range(self.n_robots_blue):
-            observation.append(self.norm_pos(self.frame.robots_blue[i].x))
-            observation.append(self.norm_pos(self.frame.robots_blue[i].y))
-            observation.append(
-                np.sin(np.deg2rad(self.frame.robots_blue[i].theta))
-            )
-            observation.append(
-                np.cos(np.deg2rad(self.frame.robots_blue[i].theta))
-            )
-            observation.append(self.norm_v(self.frame.robots_blue[i].v_x))
-            observation.append(self.norm_v(self.frame.robots_blue[i].v_y))
-            observation.append(self.norm_w(self.frame.robots_blue[i].v_theta))
-            # observation.append(1 if self.frame.robots_blue[i].infrared else 0)
-
-        for i in range(self.n_robots_yellow):
-            observation.append(self.norm_pos(self.frame.robots_yellow[i].x))
-            observation.append(self.norm_pos(self.frame.robots_yellow[i].y))
-            observation.append(self.norm_v(self.frame.robots_yellow[i].v_x))
-            observation.append(self.norm_v(self.frame.robots_yellow[i].v_y))
-            observation.append(self.norm_w(self.frame.robots_yellow[i].v_theta))
-
-        nearest_blue_robot, nearest_blue_robot_dist = self.get_nearest_robot_idx(
-            [self.frame.ball.x, self.frame.ball.y], "blue")
-        nearest_yellow_robot, nearest_yellow_robot_dist = self.get_nearest_robot_idx(
-            [self.frame.ball.x, self.frame.ball.y], "yellow")
+    def _frame_to_observations(self):
+        # Called once for every new frame, both on reset and step
+        self._cache_frame()
+        ball = self._ball
+        blue = self._blue_state
+        yellow = self._yellow_state
+
+        observation = self._obs_buf
+        observation[0:4] = (ball.x * self._pos_scale, ball.y * self._pos_scale,
+                            ball.v_x * self._v_scale, ball.v_y * self._v_scale)
+
+        # Blue: [X, Y, sin(theta), cos(theta), v_x, v_y, v_theta] per robot
+        blue_obs = observation[4:self._yellow_obs_start].reshape(self.n_robots_blue, 7)
+        blue_obs[:, 0:2] = blue[:, 0:2] * self._pos_scale
+        np.multiply(blue[:, 2], _DEG2RAD, out=self._blue_theta)
+        np.sin(self._blue_theta, out=blue_obs[:, 2])
+        np.cos(self._blue_theta, out=blue_obs[:, 3])
+        blue_obs[:, 4:6] = blue[:, 3:5] * self._v_scale
+        blue_obs[:, 6] = blue[:, 5] * self._w_scale
+
+        # Yellow: [X, Y, v_x, v_y, v_theta] per robot
+        yellow_obs = observation[self._yellow_obs_start:].reshape(self.n_robots_yellow, 5)
+        yellow_obs[:, 0:2] = yellow[:, 0:2] * self._pos_scale
+        yellow_obs[:, 2:4] = yellow[:, 3:5] * self._v_scale
+        yellow_obs[:, 4] = yellow[:, 5] * self._w_scale
+
+        # Same bounds as norm_pos/norm_v/norm_w, sin/cos already lie inside them
+        np.clip(observation, -self.NORM_BOUNDS, self.NORM_BOUNDS, out=observation)
+
+        # Nearest robot of each team to the ball, argmin keeps the lowest idx on ties like get_nearest_robot_idx
+        blue_ball_dist = np.hypot(blue[:, 0] - ball.x, blue[:, 1] - ball.y)
+        yellow_ball_dist = np.hypot(yellow[:, 0] - ball.x, yellow[:, 1] - ball.y)
+        nearest_blue_robot = int(blue_ball_dist.argmin())
+        nearest_blue_robot_dist = blue_ball_dist[nearest_blue_robot]
+        nearest_yellow_robot = int(yellow_ball_dist.argmin())
+        nearest_yellow_robot_dist = yellow_ball_dist[nearest_yellow_robot]
 
         threshold = 0.15
         self.last_possession = self.possession_robot_idx
@@ -156,191 +260,177 @@ class SSLShootEnv(SSLBaseEnv):
         # observation.append(self.possession_robot_idx)
         # observation.append(self.active_robot_idx)
 
-
-        return np.array(observation, dtype=np.float32)
+        # Callers (e.g. the replay buffer) keep references, hand out a copy
+        return observation.copy()
 
     def _get_commands(self, actions):
-        commands = []
+        commands = self._cmd_buf
+        n_blue_random = self.n_robots_blue - 1
+
+        # Actions of every non-controlled robot and the blue kick draws, one RNG call each
+        random_actions = self._rng.uniform(self._action_low, self._action_high,
+                                           (n_blue_random + self.n_robots_yellow, 4))
+        blue_kick_v_x = (self.kick_speed_x
+                         * (self._rng.uniform(-1.0, 1.0, self.n_robots_blue) < actions[3])).tolist()
+        yellow_kick_v_x = (self.kick_speed_x * (random_actions[n_blue_random:, 3] > 0)).tolist()
+        rand_idx = 0
 
         # Blue robot
         for i in range(self.n_robots_blue):
             if i != self.active_robot_idx:
-                random_actions = self.action_space.sample()
                 angle = self.frame.robots_blue[i].theta
-                v_x, v_y, v_theta = self.convert_actions(random_actions, np.deg2rad(angle))
-                cmd = Robot(yellow=False, id=i, v_x=v_x, v_y=v_y, v_theta=v_theta,
-                            kick_v_x=self.kick_speed_x if random.uniform(-1, 1) < actions[3] else 0.,
-                            dribbler=True)
-                commands.append(cmd)
+                v_x, v_y, v_theta = self.convert_actions(random_actions[rand_idx], angle * _DEG2RAD)
+                rand_idx += 1
+                commands[i] = Robot(yellow=False, id=i, v_x=v_x, v_y=v_y, v_theta=v_theta,
+                                    kick_v_x=blue_kick_v_x[i], dribbler=True)
             else:
                 # Controlled robot
                 angle = self.frame.robots_blue[self.active_robot_idx].theta
-                v_x, v_y, v_theta = self.convert_actions(actions, np.deg2rad(angle))
-                cmd = Robot(yellow=False, id=0, v_x=v_x, v_y=v_y, v_theta=v_theta,
-                            kick_v_x=self.kick_speed_x if random.uniform(-1, 1) < actions[3] else 0.,
-                            dribbler=True)
-                commands.append(cmd)
+                v_x, v_y, v_theta = self.convert_actions(actions, angle * _DEG2RAD)
+                commands[i] = Robot(yellow=False, id=0, v_x=v_x, v_y=v_y, v_theta=v_theta,
+                                    kick_v_x=blue_kick_v_x[i], dribbler=True)
 
         # Yellow robot
         for i in range(self.n_robots_yellow):
-            random_actions = self.action_space.sample()
             angle = self.frame.robots_yellow[i].theta
-            v_x, v_y, v_theta = self.convert_actions(random_actions, np.deg2rad(angle))
-            cmd = Robot(yellow=True, id=i, v_x=v_x, v_y=v_y, v_theta=v_theta,
-                        kick_v_x=self.kick_speed_x if random_actions[3] > 0 else 0.,
-                        dribbler=True)
-            commands.append(cmd)
+            v_x, v_y, v_theta = self.convert_actions(random_actions[rand_idx], angle * _DEG2RAD)
+            rand_idx += 1
+            commands[self.n_robots_blue + i] = Robot(yellow=True, id=i, v_x=v_x, v_y=v_y, v_theta=v_theta,
+                                                     kick_v_x=yellow_kick_v_x[i], dribbler=True)
         self.commands = commands
         return commands
 
     def convert_actions(self, action, angle):
-
         """Denormalize, clip to absolute max and convert to local"""
-        # Denormalize
-        v_x = action[0] * self.max_v
-        v_y = action[1] * self.max_v
-        v_theta = action[2] * self.max_w
-        # Convert to local
-        v_x, v_y = v_x * np.cos(angle) + v_y * np.sin(angle), \
-                   -v_x * np.sin(angle) + v_y * np.cos(angle)
-
-        # clip by max absolute
-        v_norm = np.linalg.norm([v_x, v_y])
-        c = v_norm < self.max_v or self.max_v / v_norm
-        v_x, v_y = v_x * c, v_y * c
-        return v_x, v_y, v_theta
+        # Plain floats keep a single compiled signature for the kernel
+        return _convert_actions(float(action[0]), float(action[1]), float(action[2]),
+                                float(angle), float(self.max_v), float(self.max_w))
 
     def _calculate_reward_and_done(self):
-        self.reward_shaping_total = {
-            'goal': 0,
-            'done_left_out':0,
-            'done_ball_out': 0,
-            'done_robot_out': 0,
-            'done_robot_in_gk_area': 0,
-            'rw_ball_grad': 0,
-            'rw_robot_grad': 0,
-            'rw_robot_orientation': 0,
-            'rw_energy': 0
-        }
+        self.reward_shaping_total.update(self._rw_zero)
         reward = 0
         done = False
 
         # Field parameters
-        half_len = self.field.length / 2
-        half_wid = self.field.width / 2
-        pen_len = self.field.penalty_length
-        half_pen_wid = self.field.penalty_width / 2
-        half_goal_wid = self.field.goal_width / 2
-
-        def robot_in_gk_area(rbt):
-            return rbt.x > half_len - pen_len and abs(rbt.y) < half_pen_wid
-
-        ball = self.frame.ball
-        robot = self.frame.robots_blue[0]
-        if robot.x < self.done_limit or ball.x < self.done_limit:
+        half_len = self._half_len
+        half_wid = self._half_wid
+        half_goal_wid = self._half_goal_wid
+
+        ball = self._ball
+        robot = self._robot0
+        rx, ry, bx, by = robot.x, robot.y, ball.x, ball.y
+        if rx < self.done_limit or bx < self.done_limit:
             done = True
             self.reward_shaping_total['done_left_out'] += 1
             reward = -10
-        if abs(robot.y) > half_wid or abs(robot.x) > half_len:
+
+        # Mutually exclusive regions, the common in field case is tested first
+        robot_out = abs(ry) > half_wid or abs(rx) > half_len
+        ball_out_y = abs(by) > half_wid
+        if not (robot_out or ball_out_y or bx < -half_len or bx > half_len):
+            if self.last_frame is not None:
+                ball_grad_rw = self.__ball_grad_rw()
+                self.reward_shaping_total['rw_ball_grad'] += ball_grad_rw
+
+                robot_grad_rw = 0.2 * self.__robot_grad_rw()
+                self.reward_shaping_total['rw_robot_grad'] += robot_grad_rw
+
+                # robot_orientation_rw = 0
+                # if self.possession_robot_idx == self.active_robot_idx:
+                #     robot_orientation_rw = 0.2 * self.__robot_orientation_rw()
+                #     self.reward_shaping_total['rw_robot_orientation'] += robot_orientation_rw
+
+                energy_rw = -self.__energy_pen() / self.energy_scale
+                self.reward_shaping_total['rw_energy'] += energy_rw
+
+                reward = ball_grad_rw + robot_grad_rw + energy_rw
+        elif robot_out:
             done = True
             self.reward_shaping_total['done_robot_out'] += 1
-        elif abs(ball.y) > half_wid:
+        elif ball_out_y:
             done = True
             self.reward_shaping_total['done_ball_out'] += 1
-        elif ball.x < -half_len or abs(ball.y) > half_wid:
-            done = True
-            if abs(ball.y) < half_goal_wid:
-                reward = -50
-                self.reward_shaping_total['goal'] -= 1
-            else:
-                self.reward_shaping_total['done_ball_out'] += 1
-        elif ball.x > half_len:
+        else:
+            # Ball crossed one of the goal lines
             done = True
-            if abs(ball.y) < half_goal_wid:
-                reward = 50
-                self.reward_shaping_total['goal'] += 1
+            if abs(by) < half_goal_wid:
+                if bx > half_len:
+                    reward = 50
+                    self.reward_shaping_total['goal'] += 1
+                else:
+                    reward = -50
+                    self.reward_shaping_total['goal'] -= 1
             else:
                 self.reward_shaping_total['done_ball_out'] += 1
-        elif self.last_frame is not None:
-
-            ball_grad_rw = self.__ball_grad_rw()
-            self.reward_shaping_total['rw_ball_grad'] += ball_grad_rw
-
-            robot_grad_rw = 0.2 * self.__robot_grad_rw()
-            self.reward_shaping_total['rw_robot_grad'] += robot_grad_rw
-
-            # robot_orientation_rw = 0
-            # if self.possession_robot_idx == self.active_robot_idx:
-            #     robot_orientation_rw = 0.2 * self.__robot_orientation_rw()
-            #     self.reward_shaping_total['rw_robot_orientation'] += robot_orientation_rw
 
-            energy_rw = -self.__energy_pen() / self.energy_scale
-            self.reward_shaping_total['rw_energy'] += energy_rw
-
-            reward = ball_grad_rw + robot_grad_rw + energy_rw
-
-        done = done
         return reward, done
 
     def _get_initial_positions_frame(self):
         '''Returns the position of each robot and ball for the initial frame'''
-        half_len = self.field.length / 2
-        half_wid = self.field.width / 2
-        pen_len = self.field.penalty_length
-        half_pen_wid = self.field.penalty_width / 2
-
-        def x():
-            return random.uniform(-self.field.length / 2+0.2,self.field.length / 2-0.2)
-
-        def y():
-            return random.uniform(-self.field.width/ 2+0.2,self.field.width / 2-0.2)
-
-        def theta():
-            return random.uniform(0, 360)
+        half_len = self._half_len
+        half_wid = self._half_wid
+        pen_len = self._pen_len
+        half_pen_wid = self._half_pen_wid
+
+        rng = self._rng
+        pos_low = (-half_len + 0.2, -half_wid + 0.2)
+        pos_high = (half_len - 0.2, half_wid - 0.2)
+        # All headings in one draw, robot 0 first then the other blue and yellow robots
+        thetas = rng.uniform(0, 360, self.n_robots_blue + self.n_robots_yellow).tolist()
+
+        def sample_pos(is_valid):
+            # Sample candidates in batches and keep the first one accepted by is_valid
+            while True:
+                candidates = rng.uniform(pos_low, pos_high, size=(16, 2))
+                valid = np.flatnonzero(is_valid(candidates))
+                if valid.size:
+                    return candidates[valid[0]]
+
+        def out_of_gk_area(candidates):
+            return ~((candidates[:, 0] > half_len - pen_len) & (np.abs(candidates[:, 1]) < half_pen_wid))
 
         pos_frame: Frame = Frame()
 
-        def in_gk_area(obj):
-            return obj.x > half_len - pen_len and abs(obj.y) < half_pen_wid
-
-        pos_frame.ball = Ball(x=x(), y=y())
-        while in_gk_area(pos_frame.ball):
-            pos_frame.ball = Ball(x=x(), y=y())
-        places = KDTree()
-        places.insert((pos_frame.ball.x, pos_frame.ball.y))
+        ball_pos = sample_pos(out_of_gk_area)
+        pos_frame.ball = Ball(x=ball_pos[0], y=ball_pos[1])
+        # Brute force distance checks, for this few objects a KDTree is slower
+        places = np.empty((1 + self.n_robots_blue + self.n_robots_yellow, 2))
+        places[0] = ball_pos
 
         r = 0.09
-        angle = theta()
-        robot_x = pos_frame.ball.x + r * math.cos(np.deg2rad(angle))
-        robot_y = pos_frame.ball.y + r * math.sin(np.deg2rad(angle))
+        angle = thetas[0]
+        robot_x = pos_frame.ball.x + r * math.cos(angle * _DEG2RAD)
+        robot_y = pos_frame.ball.y + r * math.sin(angle * _DEG2RAD)
         pos_frame.robots_blue[0] = Robot(
             x=robot_x, y=robot_y, theta=angle + 180
         )
         self.done_limit  = robot_x - 0.5
-        places.insert((pos_frame.ball.x, pos_frame.ball.y))
+        places[1] = robot_x, robot_y
+        n_places = 2
         min_dist = 0.2
+
+        def far_from_places(candidates):
+            dist_sq = ((candidates[:, None, :] - places[None, :n_places, :]) ** 2).sum(axis=2)
+            return dist_sq.min(axis=1) >= min_dist ** 2
+
         for i in range(self.n_robots_blue):
             if i == 0:
                 continue
-            pos = (x(), y())
-            while places.get_nearest(pos)[1] < min_dist:
-                pos = (x(), y())
-
-            places.insert(pos)
-            pos_frame.robots_blue[i] = Robot(x=pos[0], y=pos[1], theta=theta())
+            pos = sample_pos(far_from_places)
+            places[n_places] = pos
+            n_places += 1
+            pos_frame.robots_blue[i] = Robot(x=pos[0], y=pos[1], theta=thetas[i])
 
         for i in range(self.n_robots_yellow):
-            pos = (x(), y())
-            while places.get_nearest(pos)[1] < min_dist:
-                pos = (x(), y())
-
-            places.insert(pos)
-            pos_frame.robots_yellow[i] = Robot(x=pos[0], y=pos[1], theta=theta())
+            pos = sample_pos(far_from_places)
+            places[n_places] = pos
+            n_places += 1
+            pos_frame.robots_yellow[i] = Robot(x=pos[0], y=pos[1], theta=thetas[self.n_robots_blue + i])
 
         return pos_frame
 
     def __energy_pen(self):
-        robot = self.frame.robots_blue[0]
+        robot = self._robot0
 
         # Sum of abs each wheel speed sent
         energy = abs(robot.v_wheel0) \
@@ -350,9 +440,8 @@ class SSLShootEnv(SSLBaseEnv):
         return energy
 
     def __towards_ball_rw(self):
-        theta = math.radians(self.frame.robots_blue[0].theta)
-        Xr, Yr, theta, Xb, Yb = self.frame.robots_blue[0].x, self.frame.robots_blue[
-            0].y, theta, self.frame.ball.x, self.frame.ball.y
+        robot, ball = self._robot0, self._ball
+        Xr, Yr, theta, Xb, Yb = robot.x, robot.y, math.radians(robot.theta), ball.x, ball.y
 
         # 计算机器人-球连线方向的角度
         line_angle = math.atan2(Yb - Yr, Xb - Xr)
@@ -361,13 +450,9 @@ class SSLShootEnv(SSLBaseEnv):
         angle = line_angle - theta
 
         # 将夹角转换为[-π,π]区间内的值
-        while angle < -math.pi:
-            angle += 2 * math.pi
-        while angle > math.pi:
-            angle -= 2 * math.pi
+        angle = math.remainder(angle, math.tau)
 
-        value = math.pi - abs(angle)
-        normalized_value = (value - 0) / (math.pi - 0)
+        normalized_value = 1.0 - abs(angle) * _INV_PI
         if normalized_value > 0.9:
             normalized_value = 1
         return normalized_value
@@ -379,7 +464,7 @@ class SSLShootEnv(SSLBaseEnv):
         if team == "yellow":
             theta = math.radians(self.frame.robots_yellow[idx].theta)
             Xr, Yr = self.frame.robots_yellow[idx].x, self.frame.robots_yellow[idx].y
-        Xb, Yb = self.frame.ball.x, self.frame.ball.y
+        Xb, Yb = self._ball.x, self._ball.y
 
         # 计算机器人-球连线方向的角度
         line_angle = math.atan2(Yb - Yr, Xb - Xr)
@@ -388,13 +473,9 @@ class SSLShootEnv(SSLBaseEnv):
         angle = line_angle - theta
 
         # 将夹角转换为[-π,π]区间内的值
-        while angle < -math.pi:
-            angle += 2 * math.pi
-        while angle > math.pi:
-            angle -= 2 * math.pi
+        angle = math.remainder(angle, math.tau)
 
-        value = math.pi - abs(angle)
-        normalized_value = (value - 0) / (math.pi - 0)
+        normalized_value = 1.0 - abs(angle) * _INV_PI
         if normalized_value >= 0.9:
             return True
         else:
@@ -404,78 +485,42 @@ class SSLShootEnv(SSLBaseEnv):
         assert (self.last_frame is not None)
 
         # Calculate previous ball dist
-        last_ball = self.last_frame.ball
-        last_robot = self.last_frame.robots_blue[0]
-        last_ball_pos = np.array([last_ball.x, last_ball.y])
-        last_robot_pos = np.array([last_robot.x, last_robot.y])
-        last_dist = np.linalg.norm(last_robot_pos - last_ball_pos)
+        last_ball = self._last_ball
+        last_robot = self._last_robot0
+        last_dist = math.hypot(last_robot.x - last_ball.x, last_robot.y - last_ball.y)
 
         # Calculate new ball dist
-        ball = self.frame.ball
-        robot = self.frame.robots_blue[0]
-        ball_pos = np.array([ball.x, ball.y])
-        robot_pos = np.array([robot.x, robot.y])
-        dist = np.linalg.norm(robot_pos - last_ball_pos)
+        robot = self._robot0
+        dist = math.hypot(robot.x - last_ball.x, robot.y - last_ball.y)
 
         move_to_ball_rw = last_dist - dist
         move_to_ball_rw = move_to_ball_rw * (1/0.05)
-        return np.clip(move_to_ball_rw, -1, 1)
+        return max(-1., min(1., move_to_ball_rw))
 
     def __ball_grad_rw(self):
         assert (self.last_frame is not None)
 
-        # Goal pos
-        mid_goalpost = np.array([self.field.length / 2, 0.])
-
-        # Calculate previous ball dist
-        last_ball = self.last_frame.ball
-        ball = self.frame.ball
-
-        last_ball_pos = np.array([last_ball.x, last_ball.y])
-        last_ball_dist = np.linalg.norm(mid_goalpost - last_ball_pos)
-
-        # Calculate new ball dist
-        ball_pos = np.array([ball.x, ball.y])
-        ball_dist = np.linalg.norm(mid_goalpost - ball_pos)
-
-
-        ball_grad = last_ball_dist - ball_dist
-        ball_grad = ball_grad * (1/0.1)
-        return np.clip(ball_grad, -1, 1)
+        last_ball = self._last_ball
+        ball = self._ball
+        goal_x, goal_y = self._mid_goal
+        return _ball_grad(last_ball.x, last_ball.y, ball.x, ball.y, goal_x, goal_y)
 
     def __robot_grad_rw(self):
         assert (self.last_frame is not None)
 
-        # Goal pos
-        up_goalpost = np.array([self.field.length / 2 , self.field.goal_width/2])
-        down_goalpost = np.array([self.field.length / 2 , -self.field.goal_width/2])
-        mid_goalpost = np.array([self.field.length / 2, 0.])
-
-        # Calculate previous ball dist
         last_robot = self.last_frame.robots_blue[self.active_robot_idx]
         robot = self.frame.robots_blue[self.active_robot_idx]
-
-        last_robot_pos = np.array([last_robot.x, last_robot.y])
-        last_robot_dist = min(np.linalg.norm(up_goalpost - last_robot_pos),np.linalg.norm(down_goalpost - last_robot_pos), np.linalg.norm(mid_goalpost - last_robot_pos))
-
-        # Calculate new ball dist
-        robot_pos = np.array([robot.x, robot.y])
-        robot_dist = min(np.linalg.norm(up_goalpost - robot_pos),np.linalg.norm(down_goalpost - robot_pos),np.linalg.norm(mid_goalpost - robot_pos))
-
-
-        ball_grad = last_robot_dist - robot_dist
-        ball_grad = ball_grad * (1/0.1)
-        return np.clip(ball_grad, -1, 1)
+        return _robot_grad(last_robot.x, last_robot.y, robot.x, robot.y,
+                           self._half_len, self._half_goal_wid)
 
     def __robot_orientation_rw(self):
         last_ori_value = self.last_ori_value
         # 机器人坐标、朝向
-        theta = math.radians(self.frame.robots_blue[0].theta)
-        Xr, Yr, theta= self.frame.robots_blue[0].x, self.frame.robots_blue[
-            0].y, theta
+        robot = self._robot0
+        Xr, Yr, theta = robot.x, robot.y, math.radians(robot.theta)
 
         # 球门坐标
-        Xg, Yg = self.field.length / 2, 0
+        Xg, Yg = self._mid_goal
 
         # 计算机器人-球门连线方向的角度
         line_angle = math.atan2(Yg - Yr, Xg - Xr)
@@ -484,12 +529,8 @@ class SSLShootEnv(SSLBaseEnv):
         angle = line_angle - theta
 
         # 将夹角转换为[-π,π]区间内的值
-        while angle < -math.pi:
-            angle += 2 * math.pi
-        while angle > math.pi:
-            angle -= 2 * math.pi
+        angle = math.remainder(angle, math.tau)
 
-        value = math.pi - abs(angle)
-        normalized_value = (value - 0) / (math.pi - 0)
+        normalized_value = 1.0 - abs(angle) * _INV_PI
         self.last_ori_value = normalized_value
         return normalized_value - last_ori_value
\ No newline at end of file
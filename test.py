@@ -4,6 +4,9 @@ import gym
 import numpy as np
 from rsoccer_gym.ssl import *
 
+# Rendering every frame dominates the step cost, keep it off for performance runs
+RENDER = False
+
 env = gym.make('SSLPassEnv-v0')
 
 ball_grad_sum = 0
@@ -14,6 +17,7 @@ for i in range(10):
     done = False
     frame = 0
     return_ = 0
+    rw_robot_grads = []
     while not done:
         frame+=1
         if frame >= 50:
@@ -22,11 +26,13 @@ for i in range(10):
         action = np.array([1,1,0,-1])
 
         next_state, reward, done, info = env.step(action)
-        env.render()
+        if RENDER:
+            env.render()
         # ball_grad_sum +=info["rw_robot_grad"]
         # ball_grad_sum += info["rw_energy"]
         # print("ball_dist",env.last_teammate_ball_dist)
-        print("reward[rw_robot_dist]",info["rw_robot_grad"])
+        rw_robot_grads.append(info["rw_robot_grad"])
         # print("ball_dist",info["rw_ball_dist"])
         # print("frame",frame,"reward",reward)
+    print("reward[rw_robot_dist]", rw_robot_grads)
     print(info)
\ No newline at end of file